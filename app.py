@@ -3,21 +3,31 @@
 import asyncio
 import datetime
 import hashlib
-import json
+import hmac
+import logging
 import os
 import random
 import re
 import secrets
+import threading
 import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
 
 import DrissionPage.errors
 import mysql.connector.errors
-from flask import Flask, request, g
+from flask import Flask, Response, request, g
+from flask.json.provider import DefaultJSONProvider
 from mysql.connector import MySQLConnection
 from mysql.connector.pooling import MySQLConnectionPool, PooledMySQLConnection
 from werkzeug.exceptions import InternalServerError
 
+# Use the optimized PBKDF2 implementation whenever it's available.
+try:
+    from fastpbkdf2 import pbkdf2_hmac
+except ImportError:
+    from hashlib import pbkdf2_hmac
+
 import config
 import openparcel.carriers as carriers
 from openparcel.logger import Logger
@@ -26,23 +36,184 @@ from openparcel.exceptions import (NotEnoughParameters, AuthenticationFailed,
                                    TitledException, ScrapingBrowserError,
                                    TrackingCodeInvalid, ServerOverwhelmedError, DatabaseError, NoProxiesFoundError,
                                    TitledInternalServerError)
+from openparcel.internal_utils import json_dumps, json_loads
 from openparcel.proxies import Proxy
-from openparcel.scraper import ScrapingPool, DuplicateScrapingOperation
+from openparcel.scraper import (ScrapeOperation, ScrapingPool,
+                                DuplicateScrapingOperation)
+
+# Get our application's logger instance. Debug logging (and the per-request
+# context that feeds it) is only enabled when the deployment asks for it.
+root_logger = Logger('flask', 'app',
+                     level=(logging.DEBUG if config.app('debug')
+                            else logging.INFO))
+
+# Number of rounds used when deriving a password hash with PBKDF2.
+PBKDF2_ITERATIONS = 100_000
+
+# Salt used for the dummy derivation performed when a username is unknown, so
+# both authentication outcomes take the same amount of time.
+DUMMY_SALT = b'\x00' * 16
+
+# Pattern of a valid username, including its length limits.
+USERNAME_REGEX = re.compile(r'\A[a-z][a-z0-9_]{2,29}\Z')
+
+# Hot SQL statements, hoisted so that every request sends the exact same
+# statement text and the server can reuse its cached parse of it.
+SQL_AUTH_PASSWORD = ('SELECT id, access_level, salt, password FROM users '
+                     'WHERE username = %s')
+SQL_AUTH_TOKEN = ('SELECT auth_tokens.token, auth_tokens.user_id, '
+                  ' users.access_level '
+                  'FROM auth_tokens '
+                  'INNER JOIN users on auth_tokens.user_id = users.id '
+                  'WHERE (users.username = %s) AND auth_tokens.active')
+SQL_TRACK_LOOKUP = (
+    'SELECT parcels.id, parcels.carrier, parcels.tracking_code, '
+    ' parcels.slug, parcels.created, history_cache.retrieved, '
+    ' history_cache.data, user_parcels.name, user_parcels.archived, '
+    ' UNIX_TIMESTAMP(history_cache.retrieved) - UNIX_TIMESTAMP() diff '
+    'FROM parcels '
+    'LEFT JOIN history_cache ON history_cache.parcel_id = parcels.id '
+    'LEFT JOIN user_parcels '
+    ' ON (user_parcels.parcel_id = parcels.id) '
+    ' AND (user_parcels.user_id = %s) '
+    'WHERE (parcels.carrier = %s) AND (parcels.tracking_code = %s) '
+    ' AND (DATEDIFF(NOW(), parcels.created) < %s) '
+    'ORDER BY history_cache.retrieved DESC LIMIT 1')
+SQL_TRACK_SLUG_LOOKUP = (
+    'SELECT user_parcels.name, user_parcels.archived, parcels.id, '
+    ' parcels.carrier, parcels.tracking_code, parcels.slug, '
+    ' parcels.created, history_cache.retrieved, history_cache.data, '
+    ' (UNIX_TIMESTAMP(history_cache.retrieved) - UNIX_TIMESTAMP()) diff '
+    'FROM history_cache '
+    'LEFT JOIN user_parcels '
+    ' ON user_parcels.parcel_id = history_cache.parcel_id '
+    'LEFT JOIN parcels ON parcels.id = history_cache.parcel_id '
+    'WHERE (user_parcels.user_id = %s) AND (parcels.slug = %s) '
+    'ORDER BY history_cache.retrieved DESC LIMIT 1')
+SQL_SAVE_LOOKUP = (
+    'SELECT parcels.id, user_parcels.name FROM parcels '
+    'LEFT JOIN user_parcels ON (user_parcels.parcel_id = parcels.id) '
+    ' AND (user_parcels.user_id = %s) '
+    'WHERE parcels.slug = %s')
+SQL_SAVE_DELETE = (
+    'DELETE FROM user_parcels WHERE (parcel_id = %s) AND (user_id = %s)')
+SQL_SAVE_INSERT = (
+    'INSERT INTO user_parcels (name, archived, user_id, parcel_id) '
+    'VALUES (%s, %s, %s, %s)')
+SQL_ARCHIVE_LOOKUP = (
+    'SELECT parcels.id, user_parcels.name, user_parcels.archived '
+    'FROM parcels '
+    'INNER JOIN user_parcels ON user_parcels.parcel_id = parcels.id '
+    'WHERE (parcels.slug = %s) AND (user_parcels.user_id = %s)')
+SQL_ARCHIVE_UPDATE = (
+    'UPDATE user_parcels '
+    'INNER JOIN parcels ON parcels.id = user_parcels.parcel_id '
+    'SET user_parcels.archived = %s '
+    'WHERE (parcels.slug = %s) AND (user_parcels.user_id = %s) '
+    ' AND (user_parcels.archived = %s)')
+SQL_LIST_PARCELS = (
+    'SELECT user_parcels.name, user_parcels.archived, parcels.id, '
+    ' parcels.carrier, parcels.tracking_code, parcels.slug, '
+    ' parcels.created, history_cache.retrieved, history_cache.data '
+    'FROM user_parcels '
+    'LEFT JOIN parcels ON parcels.id = user_parcels.parcel_id '
+    'LEFT JOIN history_cache ON (history_cache.parcel_id = parcels.id) '
+    ' AND (history_cache.id = '
+    '  (SELECT MAX(hc.id) FROM history_cache hc '
+    '   WHERE (hc.parcel_id = parcels.id) AND (hc.retrieved = '
+    '    (SELECT MAX(hc2.retrieved) FROM history_cache hc2 '
+    '     WHERE hc2.parcel_id = parcels.id)))) '
+    'WHERE user_parcels.user_id = %s')
+SQL_LIST_FRESHNESS = (
+    'SELECT MAX(history_cache.retrieved), COUNT(*), '
+    ' SUM(user_parcels.archived), '
+    " BIT_XOR(DISTINCT CRC32(CONCAT(user_parcels.parcel_id, ':', "
+    "  user_parcels.name, ':', user_parcels.archived))) "
+    'FROM user_parcels '
+    'LEFT JOIN history_cache '
+    ' ON history_cache.parcel_id = user_parcels.parcel_id '
+    'WHERE user_parcels.user_id = %s')
+SQL_TRACK_USER_PARCEL = (
+    'SELECT name, archived FROM user_parcels '
+    'WHERE (user_id = %s) AND (parcel_id = %s)')
+SQL_PARCEL_INSERT = (
+    'INSERT INTO parcels (carrier, tracking_code, created, slug) '
+    'VALUES (%s, %s, %s, %s)')
+SQL_HISTORY_INSERT = (
+    'INSERT INTO history_cache (parcel_id, retrieved, data) '
+    'VALUES (%s, %s, %s)')
+SQL_REGISTER_CHECK = 'SELECT 1 FROM users WHERE username = %s LIMIT 1'
+SQL_REGISTER_INSERT = (
+    'INSERT INTO users (username, password, salt) VALUES (%s, %s, %s)')
+SQL_TOKEN_INSERT = (
+    'INSERT INTO auth_tokens (token, user_id, description) '
+    'VALUES (%s, %s, %s)')
+SQL_TOKEN_REVOKE_LOOKUP = (
+    'SELECT token, description FROM auth_tokens '
+    'WHERE (user_id = %s) AND active')
+SQL_TOKEN_REVOKE = (
+    'UPDATE auth_tokens SET active = false '
+    'WHERE (token = %s) AND (user_id = %s)')
+SQL_SAVE_CODE_LOOKUP = (
+    'SELECT parcels.id, parcels.slug, user_parcels.name '
+    'FROM parcels LEFT JOIN user_parcels '
+    ' ON (parcels.id = user_parcels.parcel_id) '
+    '  AND (user_parcels.user_id = %s) '
+    'WHERE (parcels.carrier = %s) AND (parcels.tracking_code = %s)')
+
+# Cache of authenticated user contexts keyed by hashed authentication token.
+AUTH_CACHE_TTL = 60
+AUTH_CACHE_MAX_ENTRIES = 10_000
+_auth_cache: dict[bytes, tuple[int, int, float]] = {}
+_auth_cache_lock = threading.Lock()
+
+# Cache of assembled parcel list responses keyed by user ID.
+PARCEL_LIST_CACHE_TTL = 300
+PARCEL_LIST_CACHE_MAX_ENTRIES = 10_000
+_parcel_list_cache: dict[int, tuple[str, dict, float]] = {}
+_parcel_list_cache_lock = threading.Lock()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes responses with the fastest JSON
+    implementation available to us."""
+
+    def dumps(self, obj: Any, **kwargs) -> str:
+        try:
+            return json_dumps(obj)
+        except TypeError:
+            # Fall back to Flask's encoder for types orjson can't handle.
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s: str | bytes, **kwargs) -> Any:
+        return json_loads(s)
 
-# Get our application's logger instance.
-root_logger = Logger('flask', 'app')
 
 # Define the global flask application object.
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 
-# Create MySQL connection pool.
+# Create MySQL connection pool. Session resets are skipped on check-in since
+# we never change session state, saving a round-trip per request.
 db_conn_pool = MySQLConnectionPool(pool_name='op_main',
                                    pool_size=config.db('pool_size'),
+                                   pool_reset_session=False,
                                    **config.db_conn())
 
 # Create our global scraping browser pool.
 scraping_pool = ScrapingPool(
-    max_instances=int(config.app('scraper')['max_instances']))
+    max_instances=int(config.app('scraper')['max_instances']),
+    per_carrier_max=int(config.app('scraper').get('per_carrier_max', 5)))
+
+# Dedicated executor for PBKDF2 derivations. The KDF releases the GIL while it
+# grinds through its iterations, so this both lets other requests run in the
+# meantime and caps how many derivations can hog the CPU at once.
+pbkdf2_executor = ThreadPoolExecutor(max_workers=2,
+                                     thread_name_prefix='pbkdf2')
+
+# Parcel cache refresh timeout. Configuration is static for the lifetime of
+# the process, so read it once instead of on every tracking request.
+CACHE_REFRESH_TIMEOUT = float(config.app('cache')['refresh_timeout'])
 
 
 def get_logger(subsystem: str) -> Logger:
@@ -61,12 +232,24 @@ def connect_db() -> MySQLConnection | PooledMySQLConnection:
     return g.db
 
 
+def invalidate_parcel_list_cache(uid: int):
+    """Drops a user's cached parcel list whenever their saved parcels list is
+    changed in any way."""
+    with _parcel_list_cache_lock:
+        _parcel_list_cache.pop(uid, None)
+
+
 @app.teardown_appcontext
 def app_context_teardown(exception):
     """Event handler when the application context is being torn down."""
     db: MySQLConnection = g.pop('db', None)
     if db is not None and db.is_connected():
-        db.commit()
+        # Handlers commit their own writes, so anything still open here is
+        # either the implicit transaction of a read-only request or the
+        # half-done statements of one that raised. Roll it back so neither the
+        # stale snapshot nor the pending writes leak into the next request
+        # that picks up this pooled connection.
+        db.rollback()
         db.close()
 
 
@@ -94,6 +277,21 @@ def handle_mysql_exception(exc: mysql.connector.errors.Error):
     }, logger=logger))
 
 
+def _auth_cache_key(username: str, auth_token: str) -> bytes:
+    """Builds an authentication cache key from a hashed token, ensuring the
+    plain text secret is never held in the cache."""
+    return hashlib.blake2b(f'{username}:{auth_token}'.encode('utf-8'),
+                           digest_size=16).digest()
+
+
+def hash_password(password: str, salt: bytes) -> bytes:
+    """Derives the hash of a user's password using our standard KDF
+    parameters."""
+    return pbkdf2_executor.submit(pbkdf2_hmac, 'sha256',
+                                  password.encode('utf-8'), salt,
+                                  PBKDF2_ITERATIONS).result()
+
+
 def is_authenticated() -> bool:
     """Checks if the user is currently authenticated."""
     return 'user_id' in g
@@ -134,34 +332,40 @@ def authenticate(username: str, password: str = None,
                     'but not both of them.',
             status_code=422)
 
-    # Check the username and get the salt used to generate the password hash.
-    conn = connect_db()
-    cur = conn.cursor()
-    cur.execute('SELECT salt FROM users WHERE username = %s', (username,))
-    row = cur.fetchone()
-    if row is None:
-        logger.info('auth_failed_username',
-                    'User authentication failed due to a wrong username being '
-                    f'provided: {username}')
-        raise AuthenticationFailed(
-            title='Invalid username',
-            message='Username is not in our database. Maybe you have'
-                    'misspelled it?',
-            status_code=401)
-    salt = bytes.fromhex(row[0])
-    cur.close()
+    # Check if we have recently authenticated this token and skip the database.
+    if auth_token is not None:
+        cache_key = _auth_cache_key(username, auth_token)
+        with _auth_cache_lock:
+            entry = _auth_cache.get(cache_key)
+        if entry is not None and entry[2] > time.monotonic():
+            g.username = username
+            g.user_id = entry[0]
+            g.user_acl = entry[1]
+            return g.user_id
 
     # Check the credentials against the database.
+    conn = connect_db()
     cur = conn.cursor()
     if password is not None:
-        # Authenticate using a password.
-        password_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'),
-                                            salt, 100_000)
-        cur.execute('SELECT id, access_level FROM users '
-                    'WHERE (username = %s) AND (password = %s)',
-                    (username, password_hash.hex()))
+        # Get everything needed to check the password in a single query.
+        cur.execute(SQL_AUTH_PASSWORD, (username,))
         row = cur.fetchone()
         if row is None:
+            # Burn the same KDF work as a real check so an attacker cannot
+            # probe for valid usernames through our response times.
+            hash_password(password, DUMMY_SALT)
+            logger.info('auth_failed_username',
+                        'User authentication failed due to a wrong username '
+                        f'being provided: {username}')
+            raise AuthenticationFailed(
+                title='Invalid username',
+                message='Username is not in our database. Maybe you have'
+                        'misspelled it?',
+                status_code=401)
+
+        # Authenticate using a password.
+        password_hash = hash_password(password, bytes(row[2]))
+        if not hmac.compare_digest(password_hash, bytes(row[3])):
             logger.info('auth_failed_password',
                         f'User {username} authentication failed due to a wrong '
                         'password.')
@@ -171,14 +375,16 @@ def authenticate(username: str, password: str = None,
                         'Check if you have typed the right password.',
                 status_code=401)
     else:
-        # Authenticate using the authentication token.
-        cur.execute('SELECT auth_tokens.user_id, users.access_level '
-                    'FROM auth_tokens '
-                    'INNER JOIN users on auth_tokens.user_id = users.id '
-                    'WHERE (auth_tokens.token = %s) AND (users.username = %s) '
-                    ' AND auth_tokens.active',
-                    (auth_token, username))
-        row = cur.fetchone()
+        # Authenticate using the authentication token. The user's candidate
+        # tokens are compared in Python with a constant-time comparison, and
+        # every candidate is always checked, so nothing about a token's prefix
+        # can be inferred from our response times.
+        cur.execute(SQL_AUTH_TOKEN, (username,))
+        token_bytes = auth_token.encode()
+        row = None
+        for candidate in cur.fetchall():
+            if hmac.compare_digest(str(candidate[0]).encode(), token_bytes):
+                row = candidate[1:]
         if row is None:
             logger.info('auth_failed_token',
                         f'User {username} authentication failed due to a wrong '
@@ -189,6 +395,13 @@ def authenticate(username: str, password: str = None,
                         'Check if you have the right authentication token for '
                         'this user.',
                 status_code=401)
+
+        # Cache the authenticated context for subsequent requests.
+        with _auth_cache_lock:
+            if len(_auth_cache) >= AUTH_CACHE_MAX_ENTRIES:
+                _auth_cache.clear()
+            _auth_cache[cache_key] = (int(row[0]), int(row[1]),
+                                      time.monotonic() + AUTH_CACHE_TTL)
     cur.close()
 
     # Caches the user information for the request lifecycle.
@@ -206,18 +419,18 @@ def http_authenticate(use_secrets: str | tuple[str, ...]) -> Optional[int]:
         return g.user_id
 
     # Ensure we build a tuple if a single string was passed for secrets.
-    if type(use_secrets) is str:
+    if isinstance(use_secrets, str):
         use_secrets = (use_secrets,)
 
     # Get a logger for us.
     logger = get_logger('auth.http')
 
-    # Check if we have the authentication key to work with.
-    auth_key = request.args.get('auth')
-    if request.method == 'POST':
-        auth_key = request.form.get('auth')
-    if 'X-Auth-Token' in request.headers:
-        auth_key = request.headers['X-Auth-Token']
+    # Check if we have the authentication key to work with. Sourced in order
+    # of cheapness: headers and query string never parse the request body.
+    auth_key = (request.headers.get('X-Auth-Token') or
+                request.args.get('auth') or
+                (request.form.get('auth') if request.method == 'POST'
+                 else None))
     if auth_key is None:
         raise NotEnoughParameters(
             title='Missing authentication key',
@@ -226,27 +439,34 @@ def http_authenticate(use_secrets: str | tuple[str, ...]) -> Optional[int]:
             status_code=401)
 
     # Break down the authentication key and perform some general checks.
-    auth_key = auth_key.split(':')
-    if len(auth_key) != 2 or not auth_key[0].strip() or not auth_key[1].strip():
+    # partition() walks the string once and never allocates a list, unlike
+    # split(), and makes the exactly-one-separator check trivial.
+    username, sep, secret = auth_key.partition(':')
+    if not sep or not username.strip() or not secret.strip() or \
+            ':' in secret:
         logger.info('auth_key_invalid', 'Authentication failed due to an '
                                         'invalid authentication key.')
         raise AuthenticationFailed(
             title='Invalid authentication key',
             message='Format of the provided authentication key is not valid.',
             status_code=200)
-    username = auth_key[0].lower()
-    secret = auth_key[1]
+    username = username.lower()
+
+    # Try the cheapest plausible secret type first: a password check costs us
+    # an entire PBKDF2 derivation, so prefer the token interpretation when the
+    # secret has the shape of one of our authentication tokens.
+    if ('password' in use_secrets and 'auth_token' in use_secrets
+            and looks_like_auth_token(secret)):
+        use_secrets = ('auth_token', 'password')
 
     # Perform the authentication.
     err = None
-    if 'password' in use_secrets:
-        try:
-            return authenticate(username, password=secret)
-        except TitledException as e:
-            err = e
-    if 'auth_token' in use_secrets:
+    for secret_type in use_secrets:
         try:
-            return authenticate(username, auth_token=secret)
+            if secret_type == 'password':
+                return authenticate(username, password=secret)
+            elif secret_type == 'auth_token':
+                return authenticate(username, auth_token=secret)
         except TitledException as e:
             err = e
 
@@ -258,6 +478,19 @@ def http_authenticate(use_secrets: str | tuple[str, ...]) -> Optional[int]:
     raise NotImplementedError('Unsupported secret type')
 
 
+def looks_like_auth_token(secret: str) -> bool:
+    """Checks if a secret has the shape of one of our authentication tokens
+    (a hex string as generated by secrets.token_hex)."""
+    if len(secret) != 40:
+        return False
+
+    try:
+        bytes.fromhex(secret)
+        return True
+    except ValueError:
+        return False
+
+
 def user_id() -> Optional[int]:
     """Returns currently logged user ID if authenticated. None otherwise."""
     return g.user_id if is_authenticated() else None
@@ -285,10 +518,7 @@ def request_uuid() -> str:
     if 'req_uuid' not in g:
         # Generate a meaningful UUID to reference the request in the future.
         g.req_uuid = (hex(round(time.time() * 1000))[2:] + '-' +
-                      hashlib.md5(request.path.encode()).hexdigest()[-8:] +
-                      '-' + hashlib.md5(json.dumps(dict(request.headers))
-                                        .encode()).hexdigest()[-12:] + '-' +
-                      random.randbytes(2).hex())
+                      secrets.token_hex(8))
 
     return g.req_uuid
 
@@ -298,6 +528,10 @@ def log_http_request(logger: Logger = None):
     # Ensure the logger has our request UUID.
     logger.uuid = request_uuid()
 
+    # Skip building the expensive context if nothing will log it anyway.
+    if not logger.is_enabled_for(logging.DEBUG):
+        return
+
     # Build our machine-readable context for the logs.
     context = {
         'method': request.method,
@@ -321,11 +555,19 @@ def log_http_request(logger: Logger = None):
                  context=context)
 
 
+async def merge_duplicate_operation(op: ScrapeOperation, carrier: BaseCarrier):
+    """Waits for another request's scraping operation of the same parcel to
+    finish and merges its results into our own carrier object."""
+    while not op.is_done():
+        await asyncio.sleep(.5)
+    op.merge_resp_into(carrier)
+
+
 def should_refresh_parcel(parcel: BaseCarrier, timediff: float,
                           force: bool = False) -> bool:
     """Checks if a parcel tracking history is old enough to have timed out."""
-    timeout = config.app('cache')['refresh_timeout']
-    return force or (not parcel.archived and abs(timediff) >= timeout)
+    return force or (not parcel.archived and
+                     abs(timediff) >= CACHE_REFRESH_TIMEOUT)
 
 
 def get_proxy(carrier: BaseCarrier) -> Proxy:
@@ -340,18 +582,20 @@ def get_proxy(carrier: BaseCarrier) -> Proxy:
     return random.choice(proxies)
 
 
+# Pre-built responses for the static endpoints that monitoring hammers on.
+INDEX_RESPONSE = Response('OpenParcel')
+PONG_RESPONSE = Response('PONG', headers={'X-OpenParcel-Version': '0.1.0'})
+
+
 @app.route('/')
 def hello_world():
-    return 'OpenParcel'
+    return INDEX_RESPONSE
 
 
 @app.route('/ping')
 def ping_pong():
     """Provides a rudimentary way to detect the server and its version."""
-    resp = app.make_response('PONG')
-    resp.headers['X-OpenParcel-Version'] = '0.1.0'
-
-    return resp
+    return PONG_RESPONSE
 
 
 @app.route('/track/<carrier_id>/<code>')
@@ -364,9 +608,11 @@ async def track(carrier_id: str, code: str, force: bool = False,
 
     # Check if we are authorized.
     http_authenticate('auth_token')
+    uid = user_id()
+    username = logged_username()
     if logger.subsystem == 'track.carrier_and_code':
         logger.debug('user_track_parcel',
-                     f'User {logged_username()} trying to track parcel '
+                     f'User {username} trying to track parcel '
                      f'{carrier_id} {code}')
 
     # Check if we have a valid tracking code.
@@ -378,7 +624,7 @@ async def track(carrier_id: str, code: str, force: bool = False,
         carrier = carriers.from_id(carrier_id)
         if carrier is None:
             logger.warning('carrier_invalid',
-                           f'User {logged_username()} passed an invalid '
+                           f'User {username} passed an invalid '
                            f'carrier ID: {carrier_id}')
             raise TitledException(
                 title='Invalid carrier ID',
@@ -387,75 +633,70 @@ async def track(carrier_id: str, code: str, force: bool = False,
                 status_code=404)
         carrier = carrier(code)
 
-    # Is this a bespoke tracking request?
+    # Check if another request is already scraping this very parcel, before
+    # paying for the cache lookup only to discover it is a duplicate.
     conn = connect_db()
-    if carrier.db_id is None:
-        # Check if it has been previously tracked and isn't outdated.
-        cur = conn.cursor()
-        cur.execute(
-            'SELECT id FROM parcels WHERE (carrier = %s) '
-            ' AND (tracking_code = %s) AND (DATEDIFF(NOW(), created) < %s) '
-            'ORDER BY created DESC LIMIT 1',
-            (carrier_id, code, carrier.outdated_period_days))
-        row = cur.fetchone()
-        cur.close()
+    dup_op = await scraping_pool.get_operation(carrier)
+    if dup_op is not None:
+        logger.debug('fetch_early_duplicate',
+                     f'Another operation is already fetching parcel '
+                     f'{carrier_id} {code}. Waiting on its results.')
+        await merge_duplicate_operation(dup_op, carrier)
+
+        # Fetch the saved parcel details that we skipped looking up.
+        if carrier.db_id is not None:
+            cur = conn.cursor()
+            cur.execute(SQL_TRACK_USER_PARCEL, (uid, carrier.db_id))
+            row = cur.fetchone()
+            cur.close()
+            if row is not None:
+                carrier.parcel_name = row[0]
+                carrier.archived = bool(row[1])
 
-        if row is not None:
-            carrier.set_parcel_id(row[0])
+        return carrier.get_resp_dict()
 
-        # Check if it has been previously cached.
-        cur = conn.cursor()
-        cond = '(parcels.id = %s) '
-        cond_values = (carrier.db_id,)
-        if carrier.db_id is None:
-            cond = '(parcels.carrier = %s) AND (parcels.tracking_code = %s) '
-            cond_values = (carrier_id, code)
-        cur.execute(
-            'SELECT parcels.id, parcels.carrier, parcels.tracking_code, '
-            ' parcels.slug, parcels.created, history_cache.retrieved, '
-            ' history_cache.data, user_parcels.name, user_parcels.archived, '
-            ' UNIX_TIMESTAMP(history_cache.retrieved) - UNIX_TIMESTAMP() diff '
-            'FROM history_cache '
-            'LEFT JOIN parcels ON history_cache.parcel_id = parcels.id '
-            'LEFT JOIN user_parcels '
-            ' ON (history_cache.parcel_id = user_parcels.parcel_id) '
-            ' AND (user_parcels.user_id = %s) '
-            f'WHERE {cond} AND (DATEDIFF(NOW(), created) < %s)'
-            'ORDER BY history_cache.retrieved DESC LIMIT 1',
-            (user_id(),) + cond_values + (carrier.outdated_period_days,))
+    # Is this a bespoke tracking request?
+    if carrier.db_id is None:
+        # Check if it has been previously tracked and cached in a single query.
+        cur = conn.cursor(dictionary=True)
+        cur.execute(SQL_TRACK_LOOKUP,
+                    (uid, carrier_id, code,
+                     carrier.outdated_period_days))
         row = cur.fetchone()
         cur.close()
 
         if row is not None:
-            carrier.slug = row[3]
-            carrier.archived = bool(row[-2]) if row[-2] is not None else False
-            carrier.parcel_name = row[-3]
+            # Store the parcel information that we already know about.
+            carrier.set_parcel_id(row['id'])
+            carrier.slug = row['slug']
+            carrier.archived = (bool(row['archived'])
+                                if row['archived'] is not None else False)
+            carrier.parcel_name = row['name']
 
+        # Check if it has been previously cached.
+        if row is not None and row['retrieved'] is not None:
             # Ensure that only the superuser can issue a force from the outside.
             if not force and is_superuser():
                 force = request.args.get('force', default=force, type=bool)
 
             # Check if we should return the cached value.
-            if not should_refresh_parcel(carrier, row[-1], force=force):
+            if not should_refresh_parcel(carrier, row['diff'], force=force):
                 carrier.from_cache(
-                    db_id=row[0],
-                    cache=json.loads(row[6]),
-                    slug=row[3],
-                    created=row[4],
-                    last_updated=row[5],
+                    db_id=row['id'],
+                    cache=json_loads(row['data']),
+                    slug=row['slug'],
+                    created=row['created'],
+                    last_updated=row['retrieved'],
                     parcel_name=carrier.parcel_name,
                     archived=carrier.archived)
                 logger.info('parcel_cached',
-                            f'User {logged_username()} requested parcel '
+                            f'User {username} requested parcel '
                             f'{carrier.slug} ({carrier.db_id}) and is being '
                             'served a cached version since it is '
                             f'{carrier.created_delta().total_seconds()} secs '
                             f'old.')
                 return carrier.get_resp_dict()
 
-            # Store the parcel ID.
-            carrier.set_parcel_id(row[0])
-
     # Fetch tracking history.
     try:
         # Set up a proxy if enabled.
@@ -480,36 +721,29 @@ async def track(carrier_id: str, code: str, force: bool = False,
         if carrier.db_id is None:
             # First time we are caching this parcel.
             cur.execute(
-                'INSERT INTO parcels (carrier, tracking_code, created, slug) '
-                'VALUES (%s, %s, %s, %s)',
-                (carrier_id, code, now.isoformat(), carrier.generate_slug()))
-            conn.commit()
+                SQL_PARCEL_INSERT,
+                (carrier_id, code, now, carrier.generate_slug()))
             carrier.set_parcel_id(cur.lastrowid)
             logger.info('parcel_new', f'New parcel {carrier.slug} '
                                       f'({carrier.db_id}) added to the system.',
                         {'context': carrier.as_dict(internals=True)})
 
         # Cache the retrieved tracking history.
-        cur.execute('INSERT INTO history_cache (parcel_id, retrieved, data) '
-                    'VALUES (%s, %s, %s)',
-                    (carrier.db_id, now.isoformat(),
-                     json.dumps(carrier.get_resp_dict(bare=True))))
+        history_json = json_dumps(carrier.get_resp_dict(bare=True))
+        cur.execute(SQL_HISTORY_INSERT,
+                    (carrier.db_id, now, history_json))
         conn.commit()
         cur.close()
         logger.info('parcel_history_new',
                     f'Updated tracking history for parcel {carrier.slug} '
-                    f'({carrier.db_id}) by {logged_username()}.')
+                    f'({carrier.db_id}) by {username}.')
 
         # Mark operation as finished and send tracking history to the client.
         op.mark_done()
         return carrier.get_resp_dict()
     except DuplicateScrapingOperation as dup:
         # Looks like another request is already taking care of this for us.
-        while not dup.op.is_done():
-            await asyncio.sleep(.5)
-
-        # Merge the scraped information from the other operation and return.
-        dup.op.merge_resp_into(carrier)
+        await merge_duplicate_operation(dup.op, carrier)
         return carrier.get_resp_dict()
     except DrissionPage.errors.BaseError as e:
         # Probably an error with our scraping stuff.
@@ -530,14 +764,16 @@ async def track_id(parcel_slug: str, force: bool = False):
 
     # Check if we are authorized.
     http_authenticate('auth_token')
+    uid = user_id()
+    username = logged_username()
     logger.debug('user_track_parcel',
-                 f'User {logged_username()} trying to track a parcel using '
+                 f'User {username} trying to track a parcel using '
                  f'slug {parcel_slug}')
 
     # Check if parcel slug is valid.
     if not BaseCarrier.is_slug_valid(parcel_slug):
         logger.info('slug_invalid',
-                    f'User {logged_username()} tried to track a parcel using '
+                    f'User {username} tried to track a parcel using '
                     f'an invalid slug ({parcel_slug}).')
         raise TitledException(
             title='Invalid parcel slug',
@@ -547,24 +783,13 @@ async def track_id(parcel_slug: str, force: bool = False):
 
     # Check if it has been previously cached.
     conn = connect_db()
-    cur = conn.cursor()
-    cur.execute(
-        'SELECT user_parcels.name, user_parcels.archived, parcels.id, '
-        ' parcels.carrier, parcels.tracking_code, parcels.slug, '
-        ' parcels.created, history_cache.retrieved, history_cache.data, '
-        ' (UNIX_TIMESTAMP(history_cache.retrieved) - UNIX_TIMESTAMP()) diff '
-        'FROM history_cache '
-        'LEFT JOIN user_parcels '
-        ' ON user_parcels.parcel_id = history_cache.parcel_id '
-        'LEFT JOIN parcels ON parcels.id = history_cache.parcel_id '
-        'WHERE (user_parcels.user_id = %s) AND (parcels.slug = %s) '
-        'ORDER BY history_cache.retrieved DESC LIMIT 1',
-        (user_id(), parcel_slug))
+    cur = conn.cursor(dictionary=True)
+    cur.execute(SQL_TRACK_SLUG_LOOKUP, (uid, parcel_slug))
     row = cur.fetchone()
     cur.close()
     if row is None:
         logger.info('slug_not_found',
-                    f'User {logged_username()} tried to track a parcel using '
+                    f'User {username} tried to track a parcel using '
                     f'a slug ({parcel_slug}) that we could not match to them.')
         raise TitledException(
             title='Unknown parcel',
@@ -573,25 +798,25 @@ async def track_id(parcel_slug: str, force: bool = False):
             status_code=404)
 
     # Gather some basic information about the parcel.
-    carrier = carriers.from_id(row[3])(str(row[4]))
+    carrier = carriers.from_id(row['carrier'])(row['tracking_code'])
     carrier.from_cache(
-        db_id=row[2],
-        cache=json.loads(row[-2]),
-        slug=row[5],
-        created=row[6],
-        last_updated=row[7],
-        parcel_name=row[0],
-        archived=bool(row[1]))
+        db_id=row['id'],
+        cache=json_loads(row['data']),
+        slug=row['slug'],
+        created=row['created'],
+        last_updated=row['retrieved'],
+        parcel_name=row['name'],
+        archived=bool(row['archived']))
 
     # Check if it's outdated or archived and always serve a cached version.
     if (carrier.is_outdated()
-            or not should_refresh_parcel(carrier, row[-1], force=force)):
+            or not should_refresh_parcel(carrier, row['diff'], force=force)):
         if carrier.is_outdated():
             status_log = 'outdated'
         else:
             status_log = f'{carrier.created_delta().total_seconds()} secs old'
         logger.info('parcel_cached',
-                    f'User {logged_username()} requested parcel {carrier.slug} '
+                    f'User {username} requested parcel {carrier.slug} '
                     f'({carrier.db_id}) and is being served a cached version '
                     f'since it is {status_log}.')
 
@@ -627,24 +852,17 @@ def register():
                     'supplied.',
             status_code=400)
 
-    # Check if the username is clean.
-    if not re.match(r'^[a-z][a-z0-9_]+$', username):
+    # Check if the username is clean and of the right length.
+    if not USERNAME_REGEX.match(username):
         raise TitledException(
             title='Invalid username',
             message='Username must contain only lowercase letters, numbers, '
-                    'and underscores.',
-            status_code=422)
-
-    # Check if username is long enough.
-    if 30 < len(username) < 3:
-        raise TitledException(
-            title='Invalid username',
-            message='Username must have at least 3 characters and no more than '
-                    '30 characters.',
+                    'and underscores, and have at least 3 characters and no '
+                    'more than 30 characters.',
             status_code=422)
 
     # Check if the password is long enough.
-    if 250 < len(password) < 6:
+    if not 6 <= len(password) <= 250:
         raise TitledException(
             title='Invalid password',
             message='Password must have at least 6 characters and no more than '
@@ -654,7 +872,7 @@ def register():
     # Check if the username already exists.
     conn = connect_db()
     cur = conn.cursor()
-    cur.execute('SELECT id FROM users WHERE username = %s', (username,))
+    cur.execute(SQL_REGISTER_CHECK, (username,))
     if cur.fetchone() is not None:
         raise TitledException(
             title='Username already exists',
@@ -664,14 +882,11 @@ def register():
 
     # Hash the password.
     salt = os.urandom(16)
-    password_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'),
-                                        salt, 100_000)
+    password_hash = hash_password(password, salt)
 
     # Insert the new user into the database.
     cur = conn.cursor()
-    cur.execute('INSERT INTO users (username, password, salt) '
-                'VALUES (%s, %s, %s)',
-                (username, password_hash.hex(), salt.hex()))
+    cur.execute(SQL_REGISTER_INSERT, (username, password_hash, salt))
     conn.commit()
     cur.close()
 
@@ -720,8 +935,7 @@ def create_auth_token(description: str = None, username: str = None,
     auth_token = secrets.token_hex(20)
     conn = connect_db()
     cur = conn.cursor()
-    cur.execute('INSERT INTO auth_tokens (token, user_id, description) '
-                'VALUES (%s, %s, %s)', (auth_token, user_id(), description))
+    cur.execute(SQL_TOKEN_INSERT, (auth_token, user_id(), description))
     conn.commit()
     cur.close()
 
@@ -746,13 +960,16 @@ def revoke_auth_token(revoke_token: str = None, username: str = None,
     else:
         authenticate(username, password, auth_token)
 
-    # Check if the authentication token to revoke actually exists.
+    # Check if the authentication token to revoke actually exists. Same
+    # constant-time, no-early-exit treatment as the authentication lookup.
     conn = connect_db()
     cur = conn.cursor()
-    cur.execute('SELECT description, active FROM auth_tokens '
-                'WHERE (token = %s) AND (user_id = %s) AND active',
-                (revoke_token, user_id()))
-    row = cur.fetchone()
+    cur.execute(SQL_TOKEN_REVOKE_LOOKUP, (user_id(),))
+    revoke_bytes = revoke_token.encode()
+    row = None
+    for candidate in cur.fetchall():
+        if hmac.compare_digest(str(candidate[0]).encode(), revoke_bytes):
+            row = candidate[1:]
     if row is None:
         raise TitledException(
             title='Authentication token not found',
@@ -764,12 +981,14 @@ def revoke_auth_token(revoke_token: str = None, username: str = None,
 
     # Mark the token as inactive.
     cur = conn.cursor()
-    cur.execute('UPDATE auth_tokens SET active = false '
-                'WHERE (token = %s) AND (user_id = %s)',
-                (revoke_token, user_id()))
+    cur.execute(SQL_TOKEN_REVOKE, (revoke_token, user_id()))
     conn.commit()
     cur.close()
 
+    # Ensure the revoked token cannot be used from the authentication cache.
+    with _auth_cache_lock:
+        _auth_cache.pop(_auth_cache_key(logged_username(), revoke_token), None)
+
     logger.info('auth_token_revoked', f'User {logged_username()} revoked '
                                       f'authentication token {revoke_token}')
     return {
@@ -796,12 +1015,7 @@ def save_parcel(carrier_id: str, code: str, archived: bool = False):
     # Get the parcel ID.
     conn = connect_db()
     cur = conn.cursor()
-    cur.execute('SELECT parcels.id, parcels.slug, user_parcels.name '
-                'FROM parcels LEFT JOIN user_parcels '
-                ' ON (parcels.id = user_parcels.parcel_id) '
-                '  AND (user_parcels.user_id = %s) '
-                'WHERE (parcels.carrier = %s) AND (parcels.tracking_code = %s)',
-                (user_id(), carrier_id, code))
+    cur.execute(SQL_SAVE_CODE_LOOKUP, (user_id(), carrier_id, code))
     row = cur.fetchone()
     cur.close()
 
@@ -814,12 +1028,12 @@ def save_parcel(carrier_id: str, code: str, archived: bool = False):
             status_code=422)
 
     # Delegate the operation.
-    return save_parcel_id(row[1], row[2], archived, parcel_id=int(row[0]))
+    return save_parcel_id(row[1], row[2], archived)
 
 
 @app.route('/save/<parcel_slug>', methods=['POST', 'DELETE'])
-def save_parcel_id(parcel_slug: str, name: str = None, archived: bool = False,
-                   parcel_id: int = None):
+def save_parcel_id(parcel_slug: str, name: str = None,
+                   archived: bool = False):
     """Stores a parcel into the user's tracked parcels list."""
     # Get the name of the saved parcel.
     if name is None:
@@ -837,11 +1051,13 @@ def save_parcel_id(parcel_slug: str, name: str = None, archived: bool = False,
 
     # Check if we are authorized.
     http_authenticate('auth_token')
+    uid = user_id()
+    username = logged_username()
 
     # Check if parcel slug is valid.
     if not BaseCarrier.is_slug_valid(parcel_slug):
         logger.info('slug_invalid',
-                    f'User {logged_username()} tried to save a parcel using '
+                    f'User {username} tried to save a parcel using '
                     f'an invalid slug ({parcel_slug}).')
         raise TitledException(
             title='Invalid parcel slug',
@@ -849,43 +1065,50 @@ def save_parcel_id(parcel_slug: str, name: str = None, archived: bool = False,
                     'too long.',
             status_code=422)
 
-    # Check if the parcel is already in the user's list.
+    # Check if the parcel exists and if it's already in the user's list. The
+    # same cursor is reused for the mutation further down to save an
+    # allocation per statement.
     conn = connect_db()
     cur = conn.cursor()
-    cur.execute(
-        'SELECT parcels.id, user_parcels.name FROM parcels '
-        'INNER JOIN user_parcels ON user_parcels.parcel_id = parcels.id '
-        'WHERE (parcels.slug = %s) AND (user_parcels.user_id = %s)',
-        (parcel_slug, user_id()))
+    cur.execute(SQL_SAVE_LOOKUP, (uid, parcel_slug))
     row = cur.fetchone()
-    if row is not None:
+
+    # Perform some cursory checks on what we've found.
+    if row is None:
+        if request.method == 'DELETE':
+            raise TitledException(
+                title='Saved parcel does not exist',
+                message='The requested parcel is not in the user\'s list.',
+                status_code=422)
+        raise TitledException(
+            title='Parcel does not exist',
+            message='Parcel was not found in our system. Try tracking it '
+                    'for its first time before attempting to save it.',
+            status_code=422)
+    parcel_id = row[0]
+    if row[1] is not None:
         if request.method == 'POST':
             raise TitledException(
                 title='Already saved',
                 message='The parcel is already in the user\'s list.',
                 status_code=422)
-        elif request.method == 'DELETE':
-            parcel_id = int(row[0])
-            name = row[1]
-    elif row is None and request.method == 'DELETE':
+        name = row[1]
+    elif request.method == 'DELETE':
         raise TitledException(
             title='Saved parcel does not exist',
             message='The requested parcel is not in the user\'s list.',
             status_code=422)
-    cur.close()
 
     # Handle the operation of removing a parcel from the user's list.
     if request.method == 'DELETE':
         # Remove it from the saved parcels list.
-        cur = conn.cursor()
-        cur.execute('DELETE FROM user_parcels '
-                    'WHERE (parcel_id = %s) AND (user_id = %s)',
-                    (parcel_id, user_id()))
+        cur.execute(SQL_SAVE_DELETE, (parcel_id, uid))
         conn.commit()
         cur.close()
+        invalidate_parcel_list_cache(uid)
 
         logger.info('user_parcel_removed',
-                    f'User {logged_username()} removed parcel {parcel_slug} '
+                    f'User {username} removed parcel {parcel_slug} '
                     f'({parcel_id}) from its tracking list')
         return {
             'title': 'Removed from saved list',
@@ -899,31 +1122,15 @@ def save_parcel_id(parcel_slug: str, name: str = None, archived: bool = False,
             message='Please supply a parcel name to be stored.',
             status_code=400)
 
-    # Check if the parcel actually exists in the system.
-    if parcel_id is None:
-        cur = conn.cursor()
-        cur.execute('SELECT id FROM parcels WHERE slug = %s', (parcel_slug,))
-        row = cur.fetchone()
-        if row is None:
-            raise TitledException(
-                title='Parcel does not exist',
-                message='Parcel was not found in our system. Try tracking it '
-                        'for its first time before attempting to save it.',
-                status_code=422)
-        cur.close()
-        parcel_id = int(row[0])
-
     # Store the saved parcel information in the database.
     name = name.strip()
-    cur = conn.cursor()
-    cur.execute(
-        'INSERT INTO user_parcels (name, archived, user_id, parcel_id) '
-        'VALUES (%s, %s, %s, %s)', (name, archived, user_id(), parcel_id))
+    cur.execute(SQL_SAVE_INSERT, (name, archived, uid, parcel_id))
     conn.commit()
     cur.close()
+    invalidate_parcel_list_cache(uid)
 
     logger.info('user_parcel_saved',
-                f'User {logged_username()} added parcel {parcel_slug} '
+                f'User {username} added parcel {parcel_slug} '
                 f'({parcel_id}) to its tracking list')
     return {
         'title': 'Parcel saved',
@@ -941,11 +1148,13 @@ def archive_flag_parcel(parcel_slug: str):
 
     # Check if we are authorized.
     http_authenticate('auth_token')
+    uid = user_id()
+    username = logged_username()
 
     # Check if parcel slug is valid.
     if not BaseCarrier.is_slug_valid(parcel_slug):
         logger.info('slug_invalid',
-                    f'User {logged_username()} tried to archive a parcel using '
+                    f'User {username} tried to archive a parcel using '
                     f'an invalid slug ({parcel_slug}).')
         raise TitledException(
             title='Invalid parcel slug',
@@ -953,51 +1162,50 @@ def archive_flag_parcel(parcel_slug: str):
                     'too long.',
             status_code=422)
 
-    # Get the saved parcel.
+    # Toggle the parcel's archived flag in a single statement. Having the
+    # previous state as a precondition also closes the race between two
+    # concurrent toggles of the same parcel.
+    archiving = request.method == 'POST'
     conn = connect_db()
     cur = conn.cursor()
-    cur.execute(
-        'SELECT parcels.id, user_parcels.name, user_parcels.archived '
-        'FROM parcels '
-        'INNER JOIN user_parcels ON user_parcels.parcel_id = parcels.id '
-        'WHERE (parcels.slug = %s) AND (user_parcels.user_id = %s)',
-        (parcel_slug, user_id()))
-    row = cur.fetchone()
+    cur.execute(SQL_ARCHIVE_UPDATE,
+                (archiving, parcel_slug, uid, not archiving))
+    updated = cur.rowcount
     cur.close()
+    if updated:
+        conn.commit()
+        invalidate_parcel_list_cache(uid)
 
-    # Perform cursory checks.
-    if row is None:
-        raise TitledException(
-            title='Parcel does not exist',
-            message='In order to archive a parcel it must be saved first.',
-            status_code=422)
-    elif request.method == 'POST' and bool(row[2]):
-        raise TitledException(
-            title='Parcel already archived',
-            message='The parcel has already been marked as archived.',
-            status_code=422)
-    elif request.method == 'DELETE' and not bool(row[2]):
+    # Get the parcel's details for the response and figure out why nothing
+    # was updated whenever that's the case.
+    cur = conn.cursor()
+    cur.execute(SQL_ARCHIVE_LOOKUP, (parcel_slug, uid))
+    row = cur.fetchone()
+    cur.close()
+    if not updated:
+        if row is None:
+            raise TitledException(
+                title='Parcel does not exist',
+                message='In order to archive a parcel it must be saved first.',
+                status_code=422)
+        elif archiving:
+            raise TitledException(
+                title='Parcel already archived',
+                message='The parcel has already been marked as archived.',
+                status_code=422)
         raise TitledException(
             title='Parcel not yet archived',
             message='The parcel has not been marked as archived previously.',
             status_code=422)
 
     # Save some variables.
-    parcel_id = int(row[0])
+    parcel_id = row[0]
     name = row[1]
 
-    # Toggle the parcel's archived flag.
-    cur = conn.cursor()
-    cur.execute('UPDATE user_parcels SET archived = %s '
-                'WHERE (user_id = %s) AND (parcel_id = %s)',
-                (request.method == 'POST', user_id(), parcel_id))
-    conn.commit()
-    cur.close()
-
     # Respond with a pretty message.
-    if request.method == 'POST':
+    if archiving:
         logger.info('user_parcel_archived',
-                    f'User {logged_username()} archived parcel {parcel_slug} '
+                    f'User {username} archived parcel {parcel_slug} '
                     f'({parcel_id})')
         return {
             'title': 'Parcel archived',
@@ -1005,7 +1213,7 @@ def archive_flag_parcel(parcel_slug: str):
         }
     else:
         logger.info('user_parcel_unarchived',
-                    f'User {logged_username()} unarchived parcel {parcel_slug} '
+                    f'User {username} unarchived parcel {parcel_slug} '
                     f'({parcel_id})')
         return {
             'title': 'Parcel unarchived',
@@ -1026,53 +1234,82 @@ def list_parcels():
 
     # Check if we are authorized.
     http_authenticate('auth_token')
+    uid = user_id()
 
-    # Get the list of the user's parcels from the database.
+    # Get a token representing the current state of the user's parcel list.
     conn = connect_db()
     cur = conn.cursor()
-    cur.execute(
-        'SELECT user_parcels.name, user_parcels.archived, parcels.id, '
-        ' parcels.carrier, parcels.tracking_code, parcels.slug, '
-        ' parcels.created '
-        'FROM user_parcels '
-        'LEFT JOIN parcels ON parcels.id = user_parcels.parcel_id '
-        'WHERE user_parcels.user_id = %s', (user_id(),))
-    parcel_rows = cur.fetchall()
+    cur.execute(SQL_LIST_FRESHNESS, (uid,))
+    freshness = str(cur.fetchone())
     cur.close()
 
-    # Go through the user's parcels appending the tracking history.
-    for parcel_row in parcel_rows:
-        # Fetch the parcel history.
-        cur = conn.cursor()
-        cur.execute('SELECT retrieved, data FROM history_cache '
-                    'WHERE parcel_id = %s ORDER BY retrieved DESC LIMIT 1',
-                    (parcel_row[2],))
-        hist_row = cur.fetchone()
-        cur.close()
-
+    # Respond with just a 304 if the client already holds the latest list. The
+    # user ID goes into the tag so different users can never validate against
+    # each other's cached lists.
+    etag = hashlib.blake2b(f'{uid}:{freshness}'.encode(),
+                           digest_size=16).hexdigest()
+    if request.if_none_match.contains(etag):
+        return Response(status=304)
+
+    # Check if we can serve the list straight from our response cache.
+    now = time.monotonic()
+    with _parcel_list_cache_lock:
+        entry = _parcel_list_cache.get(uid)
+        if entry is not None and entry[0] == freshness and entry[2] > now:
+            response = app.make_response(entry[1])
+            response.set_etag(etag)
+            return response
+
+    # Get the user's parcels and their latest tracking history in one query.
+    cur = conn.cursor(dictionary=True)
+    cur.execute(SQL_LIST_PARCELS, (uid,))
+
+    # Go through the user's parcels appending the tracking history. The
+    # carrier class lookup and the append method are hoisted out of the loop
+    # since they are paid once per parcel otherwise.
+    carrier_classes = {}
+    from_id = carriers.from_id
+    parcels_append = resp['parcels'].append
+    for parcel_row in cur:
         # Check if there's no tracking history for this parcel.
-        if hist_row is None:
+        if parcel_row['data'] is None:
             logger.error(
                 'no_history',
-                f'User parcel ({parcel_row[5]}) has no tracking history',
+                f'User parcel ({parcel_row["slug"]}) has no tracking history',
                 {'row': parcel_row})
             continue
 
         # Build up the tracked object.
-        carrier = carriers.from_id(parcel_row[3])(str(parcel_row[4]))
+        carrier_id = parcel_row['carrier']
+        carrier_cls = carrier_classes.get(carrier_id)
+        if carrier_cls is None:
+            carrier_cls = from_id(carrier_id)
+            carrier_classes[carrier_id] = carrier_cls
+        carrier = carrier_cls(parcel_row['tracking_code'])
         carrier.from_cache(
-            db_id=parcel_row[2],
-            cache=json.loads(hist_row[1]),
-            slug=parcel_row[5],
-            created=parcel_row[6],
-            last_updated=hist_row[0],
-            parcel_name=parcel_row[0],
-            archived=parcel_row[1])
+            db_id=parcel_row['id'],
+            cache=json_loads(parcel_row['data']),
+            slug=parcel_row['slug'],
+            created=parcel_row['created'],
+            last_updated=parcel_row['retrieved'],
+            parcel_name=parcel_row['name'],
+            archived=parcel_row['archived'])
 
         # Append the object to the list.
-        resp['parcels'].append(carrier.get_resp_dict())
+        parcels_append(carrier.get_resp_dict())
+    cur.close()
 
-    return resp
+    # Cache the assembled response for subsequent refreshes.
+    with _parcel_list_cache_lock:
+        if len(_parcel_list_cache) >= PARCEL_LIST_CACHE_MAX_ENTRIES:
+            _parcel_list_cache.clear()
+        _parcel_list_cache[uid] = (freshness, resp,
+                                   now + PARCEL_LIST_CACHE_TTL)
+
+    # Tag the response so clients can poll us cheaply.
+    response = app.make_response(resp)
+    response.set_etag(etag)
+    return response
 
 
 if __name__ == '__main__':
@@ -60,11 +60,7 @@ def names() -> list[str]:
 
 def from_id(uid: str) -> Optional[BaseCarrier.__class__]:
     """Gets a carrier object based on its ID."""
-    for carrier in carriers():
-        if carrier.uid == uid:
-            return carrier
-
-    return None
+    return _CARRIER_BY_ID.get(uid)
 
 
 def from_name(name: str) -> Optional[BaseCarrier.__class__]:
@@ -76,5 +72,6 @@ def from_name(name: str) -> Optional[BaseCarrier.__class__]:
     return None
 
 
-# Load all the carrier modules.
+# Load all the carrier modules and build the ID registry.
 _load_modules()
+_CARRIER_BY_ID = {carrier.uid: carrier for carrier in carriers()}
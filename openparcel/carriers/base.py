@@ -23,6 +23,11 @@ from openparcel.internal_utils import is_datetime_aware
 if TYPE_CHECKING:
     from openparcel.proxies import Proxy
 
+# Pre-compiled patterns for the validators and the slug generator.
+_SLUG_RE = re.compile(r'^[a-z-0-9]+$')
+_TRACKING_CODE_INVALID_RE = re.compile(r'[^A-Za-z0-9-]+')
+_SLUG_CLEAN_RE = re.compile(r'[^A-Za-z0-9]+')
+
 
 class BaseCarrier:
     """Base class for all carriers in the system."""
@@ -106,9 +111,8 @@ class BaseCarrier:
             return self.slug
 
         # Build the base of the slug.
-        clean = re.compile(r'[^A-Za-z0-9]+')
-        self.slug = (clean.sub('', self.uid)[:5] + '-' +
-                     clean.sub('', self.tracking_code)[:8].lower())
+        self.slug = (_SLUG_CLEAN_RE.sub('', self.uid)[:5] + '-' +
+                     _SLUG_CLEAN_RE.sub('', self.tracking_code)[:8].lower())
 
         # Generate the random bit of the slug.
         rand = secrets.token_bytes(random.randint(2, 3))
@@ -124,13 +128,13 @@ class BaseCarrier:
             return False
 
         # Check if it only contains the characters that we care about.
-        return re.match('^[a-z-0-9]+$', slug) is not None
+        return _SLUG_RE.match(slug) is not None
 
     @staticmethod
     def is_tracking_code_valid(tracking_code: str) -> bool:
         """Checks if a parcel's tracking code is in fact valid (does not
         contain any invalid characters)."""
-        return re.search('[^A-Za-z0-9-]+', tracking_code) is None
+        return _TRACKING_CODE_INVALID_RE.search(tracking_code) is None
 
     def is_similar(self, other: Self):
         """Checks if a parcel is similar to this one. Uses the slug (if
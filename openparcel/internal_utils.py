@@ -1,8 +1,32 @@
 #!/usr/bin/env python3
 
 import datetime
+import json
+from typing import Any
+
+# Use the much faster orjson implementation whenever it's available.
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 def is_datetime_aware(dt: datetime.datetime) -> bool:
     """Checks if a datetime object is offset aware or not."""
     return dt.tzinfo is not None and dt.tzinfo.utcoffset(dt) is not None
+
+
+def json_dumps(obj: Any) -> str:
+    """Serializes an object into a JSON string using the fastest JSON
+    implementation available to us."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj)
+
+
+def json_loads(data: str | bytes) -> Any:
+    """Parses a JSON document using the fastest JSON implementation available
+    to us."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -15,20 +15,26 @@ class Logger:
     """The overarching class that abstracts away the logging details."""
 
     def __init__(self, system: str, subsystem: str, log_dir: str = None,
-                 uuid: str = None):
+                 uuid: str = None, level: int = logging.DEBUG):
         self.subsystem = subsystem
         self.log_dir = log_dir
         self.uuid = uuid
+        self.level = level
 
         # Create a new logger for us to use.
         self.logger = logging.getLogger(system)
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel(level)
         self._setup()
 
     def for_subsystem(self, subsystem: str) -> Logger:
         """Creates a derived logger for a specific subsystem."""
         return Logger(self.logger.name, subsystem, log_dir=self.log_dir,
-                      uuid=self.uuid)
+                      uuid=self.uuid, level=self.level)
+
+    def is_enabled_for(self, level: int) -> bool:
+        """Checks if the underlying logger will actually handle messages
+        logged at the specified level."""
+        return self.logger.isEnabledFor(level)
 
     def log(self, level: int, action_id: str, message: str,
             context: dict = None):
@@ -151,10 +151,13 @@ class DuplicateScrapingOperation(Exception):
 class ScrapingPool:
     """An abstraction over the tool that will be used for scraping a website."""
 
-    def __init__(self, max_instances: int = 5, logger: Logger = None):
+    def __init__(self, max_instances: int = 5, per_carrier_max: int = 5,
+                 logger: Logger = None):
         self.max_instances = max_instances
+        self.per_carrier_max = per_carrier_max
         self.instances: list[ScrapeOperation] = []
         self._instances_lock = asyncio.Lock()
+        self._carrier_semaphores: dict[str, threading.BoundedSemaphore] = {}
 
         # Create our logger if needed.
         if logger is None:
@@ -178,24 +181,54 @@ class ScrapingPool:
                                'is already fetching this parcel.')
             raise DuplicateScrapingOperation(op)
 
-        # Wait until an instance is available.
+        # Wait until a slot for this carrier and an instance are available. The
+        # semaphore is a thread-safe one polled without blocking, since every
+        # request runs in its own event loop and an asyncio primitive can only
+        # be awaited from the loop it was first bound to. The slot is taken
+        # before the availability check so the check isn't stale by the time
+        # we proceed, and it must be handed back if the deadline (or a
+        # cancellation) fires after it was already granted, otherwise the
+        # carrier's capacity shrinks permanently.
+        sem = self._carrier_semaphore(parcel.uid)
+        acquired = False
         try:
             async with asyncio.timeout(timeout):
-                while not (await self.is_available()):
+                while True:
+                    if not acquired:
+                        acquired = sem.acquire(blocking=False)
+                    if acquired and await self.is_available():
+                        break
                     await asyncio.sleep(.3)
         except TimeoutError:
+            if acquired:
+                sem.release()
             local_logger.info('fetch.timeout',
                               f'Fetch operation for parcel {parcel.uid} '
                               f'{parcel.tracking_code} timed out.')
             raise TimeoutError('Could not allocate a scraper instance in time. '
                                'The service is overloaded.')
+        except BaseException:
+            if acquired:
+                sem.release()
+            raise
 
         # Run scraping operation and remove our own instance when we are done.
-        op = ScrapeOperation(parcel, local_logger)
-        await self.run_instance(op)
+        try:
+            op = ScrapeOperation(parcel, local_logger)
+            await self.run_instance(op)
+        finally:
+            sem.release()
 
         return op
 
+    def _carrier_semaphore(self, carrier_uid: str) -> threading.BoundedSemaphore:
+        """Gets, lazily creating if needed, the semaphore that bounds the
+        number of simultaneous fetches against a single carrier."""
+        if carrier_uid not in self._carrier_semaphores:
+            return self._carrier_semaphores.setdefault(
+                carrier_uid, threading.BoundedSemaphore(self.per_carrier_max))
+        return self._carrier_semaphores[carrier_uid]
+
     async def get_operation(self, parcel: BrowserBaseCarrier) \
             -> ScrapeOperation | None:
         """Tries to get a scraping operation based on a parcel. This method
@@ -11,8 +11,8 @@ USE openparcel;
 CREATE TABLE IF NOT EXISTS users(
 	id              BIGINT          PRIMARY KEY AUTO_INCREMENT,
 	username        VARCHAR(30)     NOT NULL,
-	password        CHAR(64)        NOT NULL,
-	salt            CHAR(32)        NOT NULL,
+	password        BINARY(32)      NOT NULL,
+	salt            BINARY(16)      NOT NULL,
     access_level    TINYINT         NOT NULL    DEFAULT 10,
 
     CONSTRAINT un_username UNIQUE (username)
@@ -38,7 +38,7 @@ CREATE TABLE IF NOT EXISTS parcels(
     slug            VARCHAR(50)     NOT NULL,
 	created         DATETIME        NOT NULL    DEFAULT CURRENT_TIMESTAMP
 ) ENGINE = INNODB;
-CREATE INDEX idx_parcels_carrier_tracking ON parcels(carrier, tracking_code);
+CREATE INDEX idx_parcels_carrier_tracking ON parcels(carrier, tracking_code, created);
 CREATE UNIQUE INDEX idx_parcels_slug ON parcels(slug);
 
 -- Relationship table for a user's tracked parcels.
@@ -70,6 +70,7 @@ CREATE TABLE IF NOT EXISTS history_cache(
 		ON DELETE CASCADE
 ) ENGINE = INNODB;
 CREATE INDEX idx_history_retrieved ON history_cache(retrieved);
+CREATE INDEX idx_history_parcel_retrieved ON history_cache(parcel_id, retrieved DESC);
 
 -- Proxy list.
 CREATE TABLE IF NOT EXISTS proxies(